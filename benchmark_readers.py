@@ -0,0 +1,111 @@
+"""
+Excel Reader Benchmark
+
+Builds synthetic UCH-style workbooks and times every available reader backend in
+categorize_uch.py on them, checking that all backends return identical frames.
+
+Usage:
+    python benchmark_readers.py [--rows 10000 100000] [--repeat 3] [--workdir DIR]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import categorize_uch as cu
+
+SHEETS = ['Services Only', 'Org Data Pull', 'Supplier Listing']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark Excel reader backends on synthetic workbooks')
+    parser.add_argument(
+        '--rows',
+        type=int,
+        nargs='+',
+        default=[10000, 100000],
+        help='Org Data Pull rows per synthetic workbook (default: 10000 100000)'
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Timed reads per backend; the best is reported (default: 3)'
+    )
+    parser.add_argument(
+        '--workdir',
+        help='Where to write the synthetic workbooks (default: a temporary directory)'
+    )
+    return parser.parse_args()
+
+
+def synthetic_frame(rows, rng):
+    codes = list(cu.DETAILED_TAXONOMY_MAP) + list(cu.CUSTOM_CODE_MAPPING)
+    start = pd.Timestamp('2025-01-01')
+    records = []
+    for i in range(rows):
+        code = rng.choice(codes)
+        records.append({
+            'Supplier': f"Vendor {rng.randrange(2000)}",
+            'Supplier Number': f"{rng.randrange(100000):06d}",
+            'Category Name': f"{code}-Category {code}",
+            'Item Name': rng.choice(['KNIFE', 'BOILER REPAIR', 'GLOVES', 'FILTER']),
+            'Item Description': f"Item {i}",
+            'Paid Amount': round(rng.random() * 5000, 2),
+            'Invoice Date': start + pd.Timedelta(days=rng.randrange(365)),
+        })
+    return pd.DataFrame(records)
+
+
+def write_synthetic_workbook(path, rows, seed=0):
+    rng = random.Random(seed)
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        pd.DataFrame({'Supplier': [f"Vendor {i}" for i in range(2000)]}).to_excel(
+            writer, sheet_name='Supplier Listing', index=False)
+        synthetic_frame(rows // 4, rng).to_excel(writer, sheet_name='Services Only', index=False)
+        synthetic_frame(rows, rng).to_excel(writer, sheet_name='Org Data Pull', index=False)
+
+
+def time_reader(path, reader, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sheets, _ = cu.read_workbook(path, SHEETS, reader)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, sheets
+
+
+def main():
+    args = parse_args()
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix='uch_bench_'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    readers = [name for name in cu.EXCEL_READERS if cu.reader_available(name)]
+
+    print(f"{'Rows':>10s}  {'Size':>8s}  {'Reader':10s}  {'Seconds':>8s}  {'Speedup':>7s}  {'Identical':9s}")
+    for rows in args.rows:
+        path = workdir / f"synthetic_{rows}.xlsx"
+        if not path.exists():
+            write_synthetic_workbook(path, rows)
+        size = f"{path.stat().st_size / 1024 / 1024:.1f}MB"
+        baseline_seconds, baseline = time_reader(path, 'openpyxl', args.repeat)
+        for reader in readers:
+            if reader == 'openpyxl':
+                seconds, sheets = baseline_seconds, baseline
+            else:
+                seconds, sheets = time_reader(path, reader, args.repeat)
+            identical = all(baseline[sheet].equals(sheets[sheet]) and
+                            baseline[sheet].dtypes.equals(sheets[sheet].dtypes) for sheet in SHEETS)
+            print(f"{rows:>10,}  {size:>8s}  {reader:10s}  {seconds:8.2f}  "
+                  f"{baseline_seconds / seconds:6.1f}x  {'yes' if identical else 'NO'}")
+        print(f"{'':>10s}  {'':>8s}  auto -> {cu.select_reader(path)}")
+
+    print(f"\nWorkbooks kept in: {workdir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,32 @@ Populates UNSPSC columns from Category Name and maps to Healthcare Taxonomy v2.9
 Extended to support all 5 taxonomy levels.
 
 Usage:
-    python categorize_uch.py [--input FILE] [--output FILE] [--analytics] [--quiet]
+    python categorize_uch.py [--input FILE] [--output FILE] [--analytics] [--rule-stats]
+                             [--shard-mode {sheets,files}] [--shard-workers N] [--quiet]
+    python categorize_uch.py --estimate N [--input FILE]
+    python categorize_uch.py --dataset DIR [--dataset-format {parquet,csv}] [--partition-period {month,quarter}]
+    python categorize_uch.py --checkpoint [--chunk-size N] [--resume]
+
+Readers: --reader auto|openpyxl|calamine|xml (see benchmark_readers.py)
 """
 
 import argparse
+import csv
+import hashlib
+import html
+import importlib.util
+import json
+import math
+import os
 import pandas as pd
+import random
 import re
+import shutil
+import time
+import zipfile
+from collections import Counter, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
 from pathlib import Path
 
 CUSTOM_CODE_MAPPING = {
@@ -263,6 +283,82 @@ DESCRIPTION_RULES = [
      'Equipment maintenance services'),
 ]
 
+TaxonomyProfile = namedtuple(
+    'TaxonomyProfile',
+    ['name', 'custom_code_mapping', 'detailed_taxonomy_map', 'segment_fallback', 'description_rules'],
+)
+
+DEFAULT_PROFILE = TaxonomyProfile(
+    'default', CUSTOM_CODE_MAPPING, DETAILED_TAXONOMY_MAP, SEGMENT_FALLBACK, DESCRIPTION_RULES,
+)
+
+TAXONOMY_PROFILES = {'default': DEFAULT_PROFILE}
+
+RESULT_COLUMNS = [
+    'UNSPSC_Code', 'UNSPSC_Category_Name', 'UNSPSC_Category_Description', 'Original_Custom_Code',
+    'Taxonomy_L1', 'Taxonomy_L2', 'Taxonomy_L3', 'Taxonomy_L4', 'Taxonomy_L5', 'Taxonomy_Key', 'Match_Method',
+]
+
+SPEND_COLUMNS = ['Paid Amount', 'Purchase Order Amount', 'Price', 'Amount']
+
+DATE_COLUMNS = ['Invoice Date', 'Paid Date', 'Payment Date', 'Purchase Order Date', 'PO Date', 'Transaction Date']
+
+# Hive-style partition directory naming. Missing values get a real label rather than
+# __HIVE_DEFAULT_PARTITION__, which pyarrow reads back as null and then can't unify
+# with the other partition values
+UNDATED_PARTITION = 'undated'
+UNCATEGORIZED_PARTITION = 'Uncategorized'
+HIVE_ESCAPE_PATTERN = re.compile(r'[\x00-\x1f"#%\'*/:=?\\\x7f{}\[\]^]')
+
+# Excel's per-sheet row limit, including the header row
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_SHEET_NAME = 31
+
+# Legal-entity tokens ignored when matching supplier names ("ACME INC" == "Acme, Incorporated")
+SUPPLIER_LEGAL_SUFFIXES = {
+    'INC', 'INCORPORATED', 'CORP', 'CORPORATION', 'CO', 'COMPANY', 'LTD', 'LIMITED',
+    'LLC', 'LLP', 'LP', 'PLLC', 'PC', 'PA', 'PLC', 'GMBH', 'THE',
+}
+
+# Trigram Jaccard similarity needed to merge two normalized supplier names
+SUPPLIER_MATCH_THRESHOLD = 0.75
+# Trigrams shared by more names than this are too common to block on
+SUPPLIER_BLOCK_MAX = 500
+
+# Distinct vendors tracked exactly before the analytics vendor sketch starts pruning
+VENDOR_SKETCH_SIZE = 10000
+
+TRANSACTION_SHEETS = ['Services Only', 'Org Data Pull']
+
+# Raw sheet XML is streamed out of the .xlsx zip in blocks of this many bytes
+XLSX_CHUNK_SIZE = 16 * 1024 * 1024
+XLSX_ROW_PATTERN = re.compile(rb'<row\b[^>]*/>|<row\b.*?</row>', re.S)
+XLSX_CELL_PATTERN = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+XLSX_VALUE_PATTERN = re.compile(rb'<v>(.*?)</v>', re.S)
+XLSX_TEXT_PATTERN = re.compile(rb'<t\b[^>]*>(.*?)</t>', re.S)
+XLSX_REF_PATTERN = re.compile(rb'\br="([A-Z]+)\d+"')
+XLSX_TYPE_PATTERN = re.compile(rb'\bt="(\w+)"')
+
+XLSX_PAYLOAD_PATTERN = re.compile(rb'<v[ >]|<is[ >]')
+XLSX_STYLE_PATTERN = re.compile(rb'\bs="(\d+)"')
+# Built-in number formats that Excel renders as dates/times
+XLSX_DATE_FORMAT_IDS = set(range(14, 23)) | set(range(27, 37)) | {45, 46, 47} | set(range(50, 59))
+
+# Columns read as text by every reader so codes keep the same type and leading zeros
+TEXT_COLUMN_PATTERN = re.compile(r'(Category Name|Code|Number|\bID)$', re.I)
+
+# Without calamine, files at least this large go through the streaming XML reader
+XML_READER_MIN_BYTES = 1024 * 1024
+
+# Two-sided 95% normal quantile for --estimate confidence intervals
+ESTIMATE_Z = 1.96
+
+# Rows categorized between checkpoints
+CHECKPOINT_CHUNK_SIZE = 50000
+
+# Stage timings are sampled on one row in every RULE_STATS_SAMPLE_EVERY
+RULE_STATS_SAMPLE_EVERY = 100
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -283,12 +379,299 @@ def parse_args():
         action='store_true',
         help='Generate spend analytics report'
     )
+    parser.add_argument(
+        '--profiles',
+        help='JSON file of client taxonomy profiles to register'
+    )
+    parser.add_argument(
+        '--profile',
+        action='append',
+        help='Taxonomy profile to emit (repeatable; first drives the summary). '
+             'Default: default plus every profile in --profiles'
+    )
+    parser.add_argument(
+        '--reader',
+        choices=['auto'] + list(EXCEL_READERS),
+        default='auto',
+        help='Excel reader backend (default: auto - calamine if installed, else xml for large .xlsx, '
+             'else openpyxl; pandas picks an engine itself, e.g. for .xls)'
+    )
+    parser.add_argument(
+        '--estimate',
+        type=int,
+        metavar='N',
+        help='Sample N rows per sheet and print coverage and spend estimates instead of a full run'
+    )
+    parser.add_argument(
+        '--rule-stats',
+        action='store_true',
+        help='Count rule hits and sample stage timings; writes <output>_rule_stats.json/.csv'
+    )
+    parser.add_argument(
+        '--shard-mode',
+        choices=['sheets', 'files'],
+        default='sheets',
+        help='How to split sheets past the Excel row limit: numbered sheets or numbered files (default: sheets)'
+    )
+    parser.add_argument(
+        '--shard-workers',
+        type=int,
+        default=1,
+        help='Processes used to write shard files in parallel (files mode only, default: 1)'
+    )
+    parser.add_argument(
+        '--max-sheet-rows',
+        type=int,
+        default=EXCEL_MAX_ROWS,
+        help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        '--dataset',
+        metavar='DIR',
+        help='Write a Hive-style partitioned dataset to DIR instead of the output workbook'
+    )
+    parser.add_argument(
+        '--dataset-format',
+        choices=['parquet', 'csv'],
+        default='parquet',
+        help='Dataset file format (default: parquet, needs pyarrow)'
+    )
+    parser.add_argument(
+        '--partition-column',
+        help=f"Date column to partition on (default: first of {', '.join(DATE_COLUMNS)})"
+    )
+    parser.add_argument(
+        '--partition-period',
+        choices=['month', 'quarter'],
+        default='month',
+        help='Date partition granularity (default: month)'
+    )
+    parser.add_argument(
+        '--partition-l1',
+        action='store_true',
+        help='Also partition by Taxonomy_L1'
+    )
+    parser.add_argument(
+        '--dataset-workers',
+        type=int,
+        default=4,
+        help='Threads used to write dataset partitions (default: 4)'
+    )
+    parser.add_argument(
+        '--supplier-aliases',
+        default='supplier_aliases.csv',
+        help='Persistent supplier alias table (default: supplier_aliases.csv)'
+    )
+    parser.add_argument(
+        '--no-normalize-suppliers',
+        dest='normalize_suppliers',
+        action='store_false',
+        help='Skip supplier name normalization and the Canonical_Supplier column'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        action='store_true',
+        help='Stage categorized chunks in <output>_checkpoint/ so a failed run can be resumed'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Resume from the checkpoint of a previous run, skipping completed chunks (implies --checkpoint)'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=CHECKPOINT_CHUNK_SIZE,
+        help=f"Rows per checkpointed chunk (default: {CHECKPOINT_CHUNK_SIZE})"
+    )
     parser.add_argument(
         '--quiet', '-q',
         action='store_true',
         help='Suppress progress output'
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.estimate is not None and args.estimate < 1:
+        parser.error('--estimate needs at least 1 row per sheet')
+    return args
+
+
+def find_spend_column(df):
+    for col in SPEND_COLUMNS:
+        if col in df.columns:
+            return col
+    return None
+
+
+def spend_value(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if pd.isna(value) else value
+
+
+class RuleStats:
+    """Hit counts and spend per match method and per rule, plus sampled stage timings."""
+
+    STAGES = ('parse', 'unspsc', 'taxonomy', 'description')
+
+    def __init__(self, sample_every=RULE_STATS_SAMPLE_EVERY, profile=DEFAULT_PROFILE):
+        self.sample_every = max(1, sample_every)
+        self.profile = profile
+        self.rows = 0
+        self.sampled_rows = 0
+        self.method_hits = {}
+        self.rule_hits = {}
+        self.stage_seconds = dict.fromkeys(self.STAGES, 0.0)
+
+    def record(self, match_method, rules, spend):
+        self.rows += 1
+        hit = self.method_hits.setdefault(match_method, [0, 0.0])
+        hit[0] += 1
+        hit[1] += spend
+        for rule in rules:
+            hit = self.rule_hits.setdefault(rule, [0, 0.0])
+            hit[0] += 1
+            hit[1] += spend
+
+    def record_timing(self, stage_seconds):
+        self.sampled_rows += 1
+        for stage, seconds in zip(self.STAGES, stage_seconds):
+            self.stage_seconds[stage] += seconds
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.sampled_rows += other.sampled_rows
+        for source, target in ((other.method_hits, self.method_hits), (other.rule_hits, self.rule_hits)):
+            for key, (hits, spend) in source.items():
+                hit = target.setdefault(key, [0, 0.0])
+                hit[0] += hits
+                hit[1] += spend
+        for stage, seconds in other.stage_seconds.items():
+            self.stage_seconds[stage] += seconds
+        return self
+
+    def rule_rows(self):
+        # Every configured rule is listed so rules that never fire show up with 0 hits
+        profile = self.profile
+        rules = [('CUSTOM_CODE_MAPPING', code) for code in profile.custom_code_mapping]
+        rules += [('DETAILED_TAXONOMY_MAP', code) for code in profile.detailed_taxonomy_map]
+        rules += [('SEGMENT_FALLBACK', segment) for segment in profile.segment_fallback]
+        rules += [('DESCRIPTION_RULES', kw) for keywords, _, _ in profile.description_rules for kw in keywords]
+        known = set(rules)
+        rules += [rule for rule in self.rule_hits if rule not in known]
+        rows = [('Match_Method', method, hits, spend) for method, (hits, spend) in self.method_hits.items()]
+        for table, rule in rules:
+            hits, spend = self.rule_hits.get((table, rule), (0, 0.0))
+            rows.append((table, rule, hits, spend))
+        return rows
+
+    def stage_estimates(self):
+        scale = self.rows / self.sampled_rows if self.sampled_rows else 0.0
+        return {
+            stage: {
+                'sampled_seconds': seconds,
+                'estimated_total_seconds': seconds * scale,
+                'mean_microseconds_per_row': seconds / self.sampled_rows * 1e6 if self.sampled_rows else 0.0,
+            }
+            for stage, seconds in self.stage_seconds.items()
+        }
+
+    def write(self, output_path):
+        json_path = output_path.with_name(f"{output_path.stem}_rule_stats.json")
+        csv_path = output_path.with_name(f"{output_path.stem}_rule_stats.csv")
+        rows = self.rule_rows()
+        with open(json_path, 'w') as f:
+            json.dump({
+                'profile': self.profile.name,
+                'rows': self.rows,
+                'sampled_rows': self.sampled_rows,
+                'sample_every': self.sample_every,
+                'stages': self.stage_estimates(),
+                'rules': [
+                    {'table': table, 'rule': rule, 'hits': hits, 'spend': spend}
+                    for table, rule, hits, spend in rows
+                ],
+            }, f, indent=2)
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Table', 'Rule', 'Hits', 'Spend'])
+            writer.writerows(rows)
+        return json_path, csv_path
+
+
+def profile_tuple(value, size, where):
+    # Taxonomy entries are (L1..L5) and custom code entries are (UNSPSC code, description)
+    if not isinstance(value, (list, tuple)) or len(value) != size:
+        raise ValueError(f"{where} must be a list of {size} values, got {value!r}")
+    return tuple(value)
+
+
+def overlay_mapping(base, overrides, size, where):
+    # A None value removes the entry from the base mapping
+    merged = dict(base)
+    for key, value in (overrides or {}).items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = profile_tuple(value, size, f"{where} '{key}'")
+    return merged
+
+
+def register_profile(name, custom_code_mapping=None, detailed_taxonomy_map=None,
+                     segment_fallback=None, description_rules=None, base='default'):
+    # Mappings are overlaid on the base profile; description rules are tried before the base's
+    if base not in TAXONOMY_PROFILES:
+        raise ValueError(f"Profile '{name}': unknown base profile '{base}'")
+    parent = TAXONOMY_PROFILES[base]
+    rules = []
+    for i, rule in enumerate(description_rules or []):
+        where = f"Profile '{name}' description_rules[{i}]"
+        keywords, taxonomy, desc = profile_tuple(rule, 3, where)
+        if not isinstance(keywords, (list, tuple)) or not all(isinstance(kw, str) for kw in keywords):
+            raise ValueError(f"{where} keywords must be a list of strings, got {keywords!r}")
+        # Descriptions are upper-cased before matching, so keywords must be too
+        taxonomy = profile_tuple(taxonomy, 5, f"{where} taxonomy")
+        rules.append((tuple(kw.upper() for kw in keywords), taxonomy, desc))
+    profile = TaxonomyProfile(
+        name,
+        overlay_mapping(parent.custom_code_mapping, custom_code_mapping, 2, f"Profile '{name}' custom_code_mapping"),
+        overlay_mapping(parent.detailed_taxonomy_map, detailed_taxonomy_map, 5,
+                        f"Profile '{name}' detailed_taxonomy_map"),
+        overlay_mapping(parent.segment_fallback, segment_fallback, 5, f"Profile '{name}' segment_fallback"),
+        rules + list(parent.description_rules),
+    )
+    TAXONOMY_PROFILES[name] = profile
+    return profile
+
+
+def profile_digest(profile):
+    # Changes whenever a profile's tables do, even if its name stays the same
+    tables = json.dumps(profile._asdict(), sort_keys=True, default=str)
+    return hashlib.sha256(tables.encode('utf-8')).hexdigest()
+
+
+def load_profiles(path):
+    with open(path) as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path} must be a JSON object of profile name to profile")
+    names = []
+    for name, spec in config.items():
+        if not re.match(r'^\w+$', name):
+            raise ValueError(f"Profile name '{name}' must be letters, digits or underscores")
+        if not isinstance(spec, dict):
+            raise ValueError(f"Profile '{name}' must be a JSON object, got {type(spec).__name__}")
+        register_profile(
+            name,
+            custom_code_mapping=spec.get('custom_code_mapping'),
+            detailed_taxonomy_map=spec.get('detailed_taxonomy_map'),
+            segment_fallback=spec.get('segment_fallback'),
+            description_rules=spec.get('description_rules'),
+            base=spec.get('base', 'default'),
+        )
+        names.append(name)
+    return names
 
 
 def parse_category_name(cat_name):
@@ -300,29 +683,29 @@ def parse_category_name(cat_name):
     return None, None
 
 
-def get_unspsc_info(code, description):
+def get_unspsc_info(code, description, profile=DEFAULT_PROFILE):
     if code is None:
         return None, None, None
     if code.startswith('99'):
-        mapped = CUSTOM_CODE_MAPPING.get(code)
+        mapped = profile.custom_code_mapping.get(code)
         if mapped:
             return mapped[0], mapped[1], code
         return None, None, code
     return code, description, None
 
 
-def get_taxonomy(unspsc_code):
+def get_taxonomy(unspsc_code, profile=DEFAULT_PROFILE):
     if unspsc_code is None or str(unspsc_code) == '00000000':
         return None, None, None, None, None, None, False
 
     code_str = str(unspsc_code).zfill(8)
 
-    if code_str in DETAILED_TAXONOMY_MAP:
-        levels = DETAILED_TAXONOMY_MAP[code_str]
+    if code_str in profile.detailed_taxonomy_map:
+        levels = profile.detailed_taxonomy_map[code_str]
         used_segment_fallback = False
     else:
         segment = code_str[:2]
-        levels = SEGMENT_FALLBACK.get(segment, (None, None, None, None, None))
+        levels = profile.segment_fallback.get(segment, (None, None, None, None, None))
         used_segment_fallback = levels[0] is not None
 
     l1, l2, l3, l4, l5 = levels
@@ -332,10 +715,20 @@ def get_taxonomy(unspsc_code):
     return l1, l2, l3, l4, l5, key, used_segment_fallback
 
 
-def get_taxonomy_from_description(item_name, item_desc):
+def find_description_keyword(item_name, item_desc, profile=DEFAULT_PROFILE):
     search_text = f"{item_name or ''} {item_desc or ''}".upper()
 
-    for keywords, taxonomy, desc in DESCRIPTION_RULES:
+    for keywords, _, _ in profile.description_rules:
+        for kw in keywords:
+            if kw in search_text:
+                return kw
+    return None
+
+
+def get_taxonomy_from_description(item_name, item_desc, profile=DEFAULT_PROFILE):
+    search_text = f"{item_name or ''} {item_desc or ''}".upper()
+
+    for keywords, taxonomy, desc in profile.description_rules:
         if any(kw in search_text for kw in keywords):
             l1, l2, l3, l4, l5 = taxonomy
             parts = [p for p in taxonomy if p is not None]
@@ -345,108 +738,1136 @@ def get_taxonomy_from_description(item_name, item_desc):
     return None, None, None, None, None, None, None
 
 
-def categorize_dataframe(df):
-    results = []
-    for _, row in df.iterrows():
-        cat_name = row.get('Category Name')
-        code, desc = parse_category_name(cat_name)
-        unspsc_code, unspsc_desc, original_custom = get_unspsc_info(code, desc)
-        l1, l2, l3, l4, l5, key, used_segment_fallback = get_taxonomy(unspsc_code)
+def matched_rules(row, result, profile=DEFAULT_PROFILE):
+    unspsc_code = result['UNSPSC_Code']
+    original_custom = result['Original_Custom_Code']
+    match_method = result['Match_Method']
+    rules = []
+    if original_custom in profile.custom_code_mapping:
+        rules.append(('CUSTOM_CODE_MAPPING', original_custom))
+    elif original_custom:
+        # Kept apart so the export never shows a mapping rule that doesn't exist
+        rules.append(('UNMAPPED_CUSTOM_CODE', original_custom))
+    if match_method == 'DESCRIPTION_FALLBACK':
+        kw = find_description_keyword(row.get('Item Name', ''), row.get('Item Description', ''), profile)
+        rules.append(('DESCRIPTION_RULES', kw))
+    elif match_method == 'SEGMENT_FALLBACK':
+        rules.append(('SEGMENT_FALLBACK', str(unspsc_code).zfill(8)[:2]))
+    elif match_method == 'DIRECT' or (original_custom and unspsc_code):
+        code_str = str(unspsc_code).zfill(8)
+        if code_str in profile.detailed_taxonomy_map:
+            rules.append(('DETAILED_TAXONOMY_MAP', code_str))
+        elif code_str[:2] in profile.segment_fallback:
+            rules.append(('SEGMENT_FALLBACK', code_str[:2]))
+    return rules
 
-        if original_custom:
-            match_method = 'CUSTOM_MAP'
-        elif unspsc_code and l1 is not None:
-            match_method = 'SEGMENT_FALLBACK' if used_segment_fallback else 'DIRECT'
-        else:
-            match_method = 'UNMATCHED'
-
-        if unspsc_code == '00000000' or l1 is None:
-            item_name = row.get('Item Name', '')
-            item_desc = row.get('Item Description', '')
-            fb_l1, fb_l2, fb_l3, fb_l4, fb_l5, fb_key, inferred_desc = get_taxonomy_from_description(item_name, item_desc)
-            if fb_l1 is not None:
-                l1, l2, l3, l4, l5, key = fb_l1, fb_l2, fb_l3, fb_l4, fb_l5, fb_key
-                unspsc_desc = inferred_desc
-                match_method = 'DESCRIPTION_FALLBACK'
-
-        results.append({
-            'UNSPSC_Code': unspsc_code,
-            'UNSPSC_Category_Name': unspsc_desc,
-            'UNSPSC_Category_Description': unspsc_desc,
-            'Original_Custom_Code': original_custom,
-            'Taxonomy_L1': l1,
-            'Taxonomy_L2': l2,
-            'Taxonomy_L3': l3,
-            'Taxonomy_L4': l4,
-            'Taxonomy_L5': l5,
-            'Taxonomy_Key': key,
-            'Match_Method': match_method,
-        })
-
-    result_df = pd.DataFrame(results)
-    return pd.concat([df.reset_index(drop=True), result_df], axis=1)
 
+def resolve_taxonomy(row, code, desc, profile=DEFAULT_PROFILE, timings=None):
+    unspsc_code, unspsc_desc, original_custom = get_unspsc_info(code, desc, profile)
+    if timings is not None:
+        timings.append(time.perf_counter())
+    l1, l2, l3, l4, l5, key, used_segment_fallback = get_taxonomy(unspsc_code, profile)
+    if timings is not None:
+        timings.append(time.perf_counter())
 
-def generate_analytics_report(df):
-    spend_col = None
-    for col in ['Paid Amount', 'Purchase Order Amount', 'Price', 'Amount']:
-        if col in df.columns:
-            spend_col = col
-            break
+    if original_custom:
+        match_method = 'CUSTOM_MAP'
+    elif unspsc_code and l1 is not None:
+        match_method = 'SEGMENT_FALLBACK' if used_segment_fallback else 'DIRECT'
+    else:
+        match_method = 'UNMATCHED'
+
+    if unspsc_code == '00000000' or l1 is None:
+        item_name = row.get('Item Name', '')
+        item_desc = row.get('Item Description', '')
+        fb_l1, fb_l2, fb_l3, fb_l4, fb_l5, fb_key, inferred_desc = get_taxonomy_from_description(
+            item_name, item_desc, profile)
+        if fb_l1 is not None:
+            l1, l2, l3, l4, l5, key = fb_l1, fb_l2, fb_l3, fb_l4, fb_l5, fb_key
+            unspsc_desc = inferred_desc
+            match_method = 'DESCRIPTION_FALLBACK'
+    if timings is not None:
+        timings.append(time.perf_counter())
+
+    return {
+        'UNSPSC_Code': unspsc_code,
+        'UNSPSC_Category_Name': unspsc_desc,
+        'UNSPSC_Category_Description': unspsc_desc,
+        'Original_Custom_Code': original_custom,
+        'Taxonomy_L1': l1,
+        'Taxonomy_L2': l2,
+        'Taxonomy_L3': l3,
+        'Taxonomy_L4': l4,
+        'Taxonomy_L5': l5,
+        'Taxonomy_Key': key,
+        'Match_Method': match_method,
+    }
+
+
+def categorize_dataframe(df, stats=None, profiles=None):
+    # Category Name is parsed once per row; each profile only adds its dictionary lookups.
+    # The first profile keeps the plain column names, others get a _<profile> suffix.
+    profiles = profiles or [DEFAULT_PROFILE]
+    results = [[] for _ in profiles]
+    spend_col = find_spend_column(df) if stats is not None else None
+    for i, (_, row) in enumerate(df.iterrows()):
+        timings = [time.perf_counter()] if stats is not None and i % stats.sample_every == 0 else None
+        code, desc = parse_category_name(row.get('Category Name'))
+        if timings is not None:
+            timings.append(time.perf_counter())
+
+        result = resolve_taxonomy(row, code, desc, profiles[0], timings)
+        if stats is not None:
+            if timings is not None:
+                stats.record_timing([end - start for start, end in zip(timings, timings[1:])])
+            spend = spend_value(row.get(spend_col)) if spend_col else 0.0
+            stats.record(result['Match_Method'], matched_rules(row, result, profiles[0]), spend)
+        results[0].append(result)
+
+        for n, profile in enumerate(profiles[1:], 1):
+            results[n].append(resolve_taxonomy(row, code, desc, profile))
+
+    frames = [df.reset_index(drop=True), pd.DataFrame(results[0], columns=RESULT_COLUMNS)]
+    for profile, profile_results in zip(profiles[1:], results[1:]):
+        frames.append(pd.DataFrame(profile_results, columns=RESULT_COLUMNS).add_suffix(f"_{profile.name}"))
+    return pd.concat(frames, axis=1)
+
+
+def normalize_supplier_name(name):
+    text = str(name).upper().replace('&', ' AND ').replace('.', '')
+    tokens = re.sub(r'[^A-Z0-9 ]+', ' ', text).split()
+    stripped = list(tokens)
+    while stripped and stripped[-1] in SUPPLIER_LEGAL_SUFFIXES:
+        stripped.pop()
+    if stripped and stripped[0] == 'THE':
+        stripped.pop(0)
+    return ' '.join(stripped or tokens)
+
+
+def supplier_ngrams(key, n=3):
+    padded = f"  {key} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def cluster_supplier_keys(keys, cached_keys=(), threshold=SUPPLIER_MATCH_THRESHOLD):
+    # Blocking on shared trigrams keeps comparisons near-linear instead of all pairs.
+    # Only `keys` are probed (against cached keys and each other); cached keys are indexed
+    # but never compared with each other, so their clusters are never re-unioned.
+    # Returns {key: root}, where root is a cached key when the key's cluster matched one.
+    cached_keys = set(cached_keys)
+    new_keys = sorted(set(keys) - cached_keys)
+    grams = {key: supplier_ngrams(key) for key in new_keys}
+    cached_grams = {key: supplier_ngrams(key) for key in cached_keys}
+    index = {}
+    for key_grams in (cached_grams, grams):
+        for key, gram_set in key_grams.items():
+            for gram in gram_set:
+                index.setdefault(gram, []).append(key)
+
+    parent = {key: key for key in new_keys}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    best_cached = {}
+    for key in new_keys:
+        shared = Counter()
+        for gram in grams[key]:
+            posting = index[gram]
+            if len(posting) <= SUPPLIER_BLOCK_MAX:
+                shared.update(other for other in posting if other > key or other in cached_keys)
+        numbers = re.findall(r'\d+', key)
+        for other, count in shared.items():
+            # "VENDOR 1" and "VENDOR 12" are different suppliers however similar they look
+            if re.findall(r'\d+', other) != numbers:
+                continue
+            other_grams = cached_grams[other] if other in cached_keys else grams[other]
+            similarity = count / (len(grams[key]) + len(other_grams) - count)
+            if similarity < threshold:
+                continue
+            if other in cached_keys:
+                if similarity > best_cached.get(key, (0.0, None))[0]:
+                    best_cached[key] = (similarity, other)
+            else:
+                parent[find(other)] = find(key)
+
+    # A cluster of new keys joins the cached key its closest member matched
+    roots = {key: find(key) for key in new_keys}
+    cluster_match = {}
+    for key, (similarity, cached) in best_cached.items():
+        root = roots[key]
+        if similarity > cluster_match.get(root, (0.0, None))[0]:
+            cluster_match[root] = (similarity, cached)
+    result = {key: key for key in set(keys) & cached_keys}
+    for key, root in roots.items():
+        result[key] = cluster_match[root][1] if root in cluster_match else root
+    return result
+
+
+def load_supplier_aliases(path):
+    if not path.exists():
+        return {}
+    table = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return {
+        row.Supplier: (row.Supplier_Key, row.Canonical_Supplier)
+        for row in table.itertuples(index=False)
+    }
+
+
+def save_supplier_aliases(aliases, path):
+    table = pd.DataFrame(
+        [(name, key, canonical) for name, (key, canonical) in aliases.items()],
+        columns=['Supplier', 'Supplier_Key', 'Canonical_Supplier'],
+    ).sort_values(['Canonical_Supplier', 'Supplier'])
+    table.to_csv(path, index=False)
+
+
+def build_supplier_aliases(supplier_counts, aliases):
+    # Cached rows (including hand edits) win; only names not seen before are clustered
+    new_keys = {name: normalize_supplier_name(name) for name in supplier_counts if name not in aliases}
+    if not new_keys:
+        return aliases
+
+    canonical_by_key = {}
+    for key, canonical in aliases.values():
+        canonical_by_key.setdefault(key, canonical)
+    roots = cluster_supplier_keys(set(new_keys.values()), cached_keys=canonical_by_key)
+
+    cluster_canonical = dict(canonical_by_key)
+    variants = {}
+    for name, key in new_keys.items():
+        variants.setdefault(roots[key], []).append(name)
+    for root, names in variants.items():
+        if root not in cluster_canonical:
+            cluster_canonical[root] = min(names, key=lambda name: (-supplier_counts[name], name))
+
+    for name, key in new_keys.items():
+        aliases[name] = (key, cluster_canonical[roots[key]])
+    return aliases
+
+
+def count_suppliers(frames):
+    counts = Counter()
+    for df in frames:
+        if 'Supplier' in df.columns:
+            counts.update(df['Supplier'].dropna().astype(str).value_counts().to_dict())
+    return counts
+
+
+def apply_supplier_aliases(df, aliases):
+    if 'Supplier' not in df.columns:
+        return df
+    canonical = {name: canonical for name, (_, canonical) in aliases.items()}
+    suppliers = df['Supplier']
+    df['Canonical_Supplier'] = suppliers.astype(str).map(canonical).where(suppliers.notna())
+    return df
+
+
+def shard_sheet_name(sheet, number):
+    suffix = f" ({number})"
+    return sheet[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+
+
+def shard_file_path(output_path, number):
+    return output_path.with_name(f"{output_path.stem}_part{number:03d}{output_path.suffix}")
+
+
+def plan_shards(sheet_rows, output_path, max_rows=EXCEL_MAX_ROWS, mode='sheets'):
+    rows_per_shard = max_rows - 1
+    plan = []
+    for sheet, rows in sheet_rows:
+        n_shards = max(1, -(-rows // rows_per_shard))
+        for k in range(n_shards):
+            start, stop = k * rows_per_shard, min(rows, (k + 1) * rows_per_shard)
+            if n_shards == 1:
+                target_file, target_sheet = output_path, sheet
+            elif mode == 'files':
+                target_file = output_path if k == 0 else shard_file_path(output_path, k + 1)
+                target_sheet = sheet
+            else:
+                target_file, target_sheet = output_path, shard_sheet_name(sheet, k + 1)
+            plan.append({
+                'source_sheet': sheet,
+                'start': start,
+                'stop': stop,
+                'file': target_file,
+                'sheet': target_sheet,
+            })
+    return plan
+
+
+def is_sharded(plan):
+    return len(plan) > len({entry['source_sheet'] for entry in plan})
+
+
+def write_shard_file(path, parts):
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for sheet, frame in parts:
+            frame.to_excel(writer, sheet_name=sheet, index=False)
+    return path
+
+
+def write_sharded_output(frames, plan, workers=1):
+    # iloc slices are views, so no shard is copied before to_excel serializes it
+    files = {}
+    for entry in plan:
+        frame = frames[entry['source_sheet']].iloc[entry['start']:entry['stop']]
+        files.setdefault(entry['file'], []).append((entry['sheet'], frame))
+
+    if workers <= 1 or len(files) == 1:
+        for path, parts in files.items():
+            write_shard_file(path, parts)
+        return
+
+    # Keep at most `workers` files in flight so pickled shards don't pile up
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, parts in files.items():
+            if len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(pool.submit(write_shard_file, path, parts))
+        for future in pending:
+            future.result()
+
+
+def write_shard_manifest(plan, output_path, max_rows=EXCEL_MAX_ROWS):
+    manifest_path = output_path.with_name(f"{output_path.stem}_manifest.json")
+    with open(manifest_path, 'w') as f:
+        json.dump({
+            'max_sheet_rows': max_rows,
+            'shards': [
+                {
+                    'source_sheet': entry['source_sheet'],
+                    'first_row': entry['start'] + 1,
+                    'last_row': entry['stop'],
+                    'rows': entry['stop'] - entry['start'],
+                    'file': entry['file'].name,
+                    'sheet': entry['sheet'],
+                }
+                for entry in plan
+            ],
+        }, f, indent=2)
+    return manifest_path
+
+
+def add_counts(target, counts):
+    for key, count in counts.items():
+        target[key] = target.get(key, 0) + int(count)
+
+
+def add_group_totals(target, rows, totals=None):
+    # target values are [rows, transactions with spend, spend]
+    for key, count in rows.items():
+        entry = target.setdefault(key, [0, 0, 0.0])
+        entry[0] += int(count)
+    if totals is not None:
+        for key, row in totals.iterrows():
+            entry = target[key]
+            entry[1] += int(row['count'])
+            entry[2] += float(row['sum'])
+
+
+class SpendAnalytics:
+    """Mergeable, bounded-memory accumulator behind the summary and analytics report.
+
+    Feed it categorized chunks with update() and combine per-worker instances with
+    merge(). Everything except vendors is keyed by taxonomy values, so it stays small.
+    With max_vendors=None vendors are exact. Otherwise past 2 * max_vendors distinct names
+    the lowest-spend vendors are pruned, and once more data arrives vendor_error bounds how
+    much any vendor may be undercounted.
+    """
+
+    COVERAGE_COLUMNS = {
+        'with_unspsc': 'UNSPSC_Code',
+        'with_l1': 'Taxonomy_L1',
+        'with_l3': 'Taxonomy_L3',
+        'with_l4': 'Taxonomy_L4',
+        'with_l5': 'Taxonomy_L5',
+        'custom_mapped': 'Original_Custom_Code',
+    }
+
+    def __init__(self, max_vendors=VENDOR_SKETCH_SIZE):
+        self.max_vendors = max_vendors
+        self.rows = 0
+        self.spend_col = None
+        self.has_supplier = False
+        self.coverage = dict.fromkeys(self.COVERAGE_COLUMNS, 0)
+        self.method_counts = {}
+        self.key_counts = {}
+        self.l1 = {}
+        self.l2 = {}
+        self.vendors = {}
+        self.vendor_error = 0.0
+        # Largest spend dropped by pruning since data last arrived; it only becomes error
+        # if a vendor shows up again, since the totals dropped so far were exact
+        self.pruned_spend = 0.0
+
+    def update(self, df):
+        spend_col = find_spend_column(df)
+        self.spend_col = self.spend_col or spend_col
+        vendor_col = 'Canonical_Supplier' if 'Canonical_Supplier' in df.columns else 'Supplier'
+        self.has_supplier = self.has_supplier or vendor_col in df.columns
+        self.rows += len(df)
+        for name, col in self.COVERAGE_COLUMNS.items():
+            self.coverage[name] += int(df[col].notna().sum())
+        add_counts(self.method_counts, df['Match_Method'].value_counts())
+        add_counts(self.key_counts, df['Taxonomy_Key'].value_counts())
+
+        for keys, target in (('Taxonomy_L1', self.l1), (['Taxonomy_L1', 'Taxonomy_L2'], self.l2)):
+            grouped = df.groupby(keys)
+            totals = grouped[spend_col].agg(['count', 'sum']) if spend_col else None
+            add_group_totals(target, grouped.size(), totals)
+
+        if spend_col and vendor_col in df.columns:
+            totals = df.groupby(vendor_col)[spend_col].agg(['count', 'sum'])
+            l1_counts = {}
+            for (vendor, l1), count in df.groupby([vendor_col, 'Taxonomy_L1']).size().items():
+                l1_counts.setdefault(vendor, {})[l1] = int(count)
+            for vendor, row in totals.iterrows():
+                self.add_vendor(vendor, int(row['count']), float(row['sum']), l1_counts.get(vendor, {}))
+            self.prune_vendors()
+        return self
+
+    def add_vendor(self, vendor, transactions, spend, l1_counts):
+        if vendor not in self.vendors and self.pruned_spend:
+            self.vendor_error += self.pruned_spend
+            self.pruned_spend = 0.0
+        entry = self.vendors.setdefault(vendor, [0, 0.0, {}])
+        entry[0] += transactions
+        entry[1] += spend
+        add_counts(entry[2], l1_counts)
+
+    def prune_vendors(self):
+        if self.max_vendors is None or len(self.vendors) <= 2 * self.max_vendors:
+            return
+        ranked = sorted(self.vendors.items(), key=lambda item: item[1][1], reverse=True)
+        dropped_spend = max(entry[1] for _, entry in ranked[self.max_vendors:])
+        self.vendors = dict(ranked[:self.max_vendors])
+        self.pruned_spend += max(dropped_spend, 0.0)
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.spend_col = self.spend_col or other.spend_col
+        self.has_supplier = self.has_supplier or other.has_supplier
+        add_counts(self.coverage, other.coverage)
+        add_counts(self.method_counts, other.method_counts)
+        add_counts(self.key_counts, other.key_counts)
+        for source, target in ((other.l1, self.l1), (other.l2, self.l2)):
+            for key, (rows, transactions, spend) in source.items():
+                entry = target.setdefault(key, [0, 0, 0.0])
+                entry[0] += rows
+                entry[1] += transactions
+                entry[2] += spend
+        for vendor, (transactions, spend, l1_counts) in other.vendors.items():
+            self.add_vendor(vendor, transactions, spend, l1_counts)
+        # Vendors pruned from other may still be here, missing up to what other dropped
+        self.vendor_error += other.vendor_error + other.pruned_spend
+        self.prune_vendors()
+        return self
+
+    def top_vendors(self, n=10):
+        ranked = sorted(self.vendors.items(), key=lambda item: item[1][1], reverse=True)[:n]
+        result = []
+        for vendor, (transactions, spend, l1_counts) in ranked:
+            # Same tie-break as Series.mode(): most frequent, then lowest value
+            if l1_counts:
+                primary = min(l1_counts, key=lambda l1: (-l1_counts[l1], l1))
+            else:
+                primary = 'Unknown'
+            result.append((vendor, transactions, spend, primary))
+        return result
+
+
+def print_summary(analytics):
+    print("\n=== Summary ===")
+    total = analytics.rows
+    coverage = analytics.coverage
+    print(f"Total transactions: {total}")
+    print(f"With UNSPSC code: {coverage['with_unspsc']} ({coverage['with_unspsc']/total*100:.1f}%)")
+    print(f"With Taxonomy L1: {coverage['with_l1']} ({coverage['with_l1']/total*100:.1f}%)")
+    print(f"With Taxonomy L3: {coverage['with_l3']} ({coverage['with_l3']/total*100:.1f}%)")
+    print(f"With Taxonomy L4: {coverage['with_l4']} ({coverage['with_l4']/total*100:.1f}%)")
+    print(f"With Taxonomy L5: {coverage['with_l5']} ({coverage['with_l5']/total*100:.1f}%)")
+    print(f"Custom codes mapped: {coverage['custom_mapped']}")
+
+    print("\n=== Top 10 Taxonomy Keys by Transaction Count ===")
+    key_counts = sorted(analytics.key_counts.items(), key=lambda item: item[1], reverse=True)[:10]
+    for key, count in key_counts:
+        print(f"  {key}: {count}")
+
+
+def print_analytics_report(analytics):
+    spend_col = analytics.spend_col
 
     print("\n" + "=" * 60)
     print("SPEND ANALYTICS REPORT")
     print("=" * 60)
 
     print("\n=== Match Method Distribution ===")
-    method_counts = df['Match_Method'].value_counts()
-    total = len(df)
-    for method, count in method_counts.items():
+    total = analytics.rows
+    for method, count in sorted(analytics.method_counts.items(), key=lambda item: item[1], reverse=True):
         pct = count / total * 100
         print(f"  {method:20s}: {count:,} ({pct:.1f}%)")
 
     print("\n=== Spend by Taxonomy L1 ===")
     if spend_col:
-        l1_spend = df.groupby('Taxonomy_L1').agg(
-            Transactions=(spend_col, 'count'),
-            Total_Spend=(spend_col, 'sum')
-        ).sort_values('Total_Spend', ascending=False)
-        total_spend = l1_spend['Total_Spend'].sum()
-        for l1, row in l1_spend.iterrows():
-            pct = row['Total_Spend'] / total_spend * 100 if total_spend > 0 else 0
-            print(f"  {l1:30s}: {row['Transactions']:,} txns, ${row['Total_Spend']:,.0f} ({pct:.1f}%)")
+        l1_spend = sorted(analytics.l1.items(), key=lambda item: item[1][2], reverse=True)
+        total_spend = sum(spend for _, (_, _, spend) in l1_spend)
+        for l1, (_, transactions, spend) in l1_spend:
+            pct = spend / total_spend * 100 if total_spend > 0 else 0
+            print(f"  {l1:30s}: {transactions:,} txns, ${spend:,.0f} ({pct:.1f}%)")
     else:
-        l1_counts = df['Taxonomy_L1'].value_counts()
-        for l1, count in l1_counts.items():
+        for l1, (count, _, _) in sorted(analytics.l1.items(), key=lambda item: item[1][0], reverse=True):
             print(f"  {l1:30s}: {count:,} transactions")
 
     print("\n=== Top 15 Taxonomy L2 Categories ===")
     if spend_col:
-        l2_spend = df.groupby(['Taxonomy_L1', 'Taxonomy_L2']).agg(
-            Transactions=(spend_col, 'count'),
-            Total_Spend=(spend_col, 'sum')
-        ).sort_values('Total_Spend', ascending=False).head(15)
-        for (l1, l2), row in l2_spend.iterrows():
+        l2_spend = sorted(analytics.l2.items(), key=lambda item: item[1][2], reverse=True)[:15]
+        for (l1, l2), (_, _, spend) in l2_spend:
             path = f"{l1} > {l2}"
-            print(f"  {path:45s}: ${row['Total_Spend']:,.0f}")
+            print(f"  {path:45s}: ${spend:,.0f}")
     else:
-        l2_counts = df.groupby(['Taxonomy_L1', 'Taxonomy_L2']).size().sort_values(ascending=False).head(15)
-        for (l1, l2), count in l2_counts.items():
+        l2_counts = sorted(analytics.l2.items(), key=lambda item: item[1][0], reverse=True)[:15]
+        for (l1, l2), (count, _, _) in l2_counts:
             path = f"{l1} > {l2}"
             print(f"  {path:45s}: {count:,}")
 
-    if 'Supplier' in df.columns and spend_col:
+    if analytics.has_supplier and spend_col:
         print("\n=== Top 10 Vendors by Spend ===")
-        vendor_spend = df.groupby('Supplier').agg(
-            Transactions=(spend_col, 'count'),
-            Total_Spend=(spend_col, 'sum'),
-            Primary_Category=('Taxonomy_L1', lambda x: x.mode().iloc[0] if len(x.mode()) > 0 else 'Unknown')
-        ).sort_values('Total_Spend', ascending=False).head(10)
-        for vendor, row in vendor_spend.iterrows():
+        for vendor, _, spend, primary in analytics.top_vendors(10):
             vendor_name = str(vendor)[:35]
-            print(f"  {vendor_name:35s}: ${row['Total_Spend']:,.0f} [{row['Primary_Category']}]")
+            print(f"  {vendor_name:35s}: ${spend:,.0f} [{primary}]")
+        if analytics.vendor_error:
+            print(f"  (approximate: vendor spend may be undercounted by up to ${analytics.vendor_error:,.0f})")
+
+    print("\n" + "=" * 60)
+
+
+def generate_analytics_report(df):
+    print_analytics_report(SpendAnalytics(max_vendors=None).update(df))
+
+
+def find_date_column(df):
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            return col
+    return None
+
+
+def hive_escape(value):
+    if pd.isna(value) or value == '':
+        return UNCATEGORIZED_PARTITION
+    return HIVE_ESCAPE_PATTERN.sub(lambda match: f"%{ord(match.group(0)):02X}", str(value))
+
+
+def partition_periods(dates, period='month'):
+    dates = pd.to_datetime(dates, errors='coerce')
+    if period == 'quarter':
+        labels = dates.dt.year.astype('Int64').astype(str) + '-Q' + dates.dt.quarter.astype('Int64').astype(str)
+    else:
+        labels = dates.dt.strftime('%Y-%m')
+    return labels.where(dates.notna(), UNDATED_PARTITION)
+
+
+def write_dataset_file(frame, path, fmt):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == 'parquet':
+        # Object columns can mix str/int/None, which parquet can't store; write them as text
+        objects = [col for col in frame.columns if frame[col].dtype == object]
+        frame = frame.astype({col: 'string' for col in objects})
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+
+def check_dataset_format(fmt):
+    if fmt == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        raise ValueError("Parquet datasets need pyarrow (pip install pyarrow) or use --dataset-format csv")
+
+
+def resolve_partition_columns(frames, date_col=None):
+    columns = {}
+    for sheet, df in frames.items():
+        col = date_col or find_date_column(df)
+        if col is None or col not in df.columns:
+            raise ValueError(f"No partition date column found in {sheet}; use --partition-column")
+        columns[sheet] = col
+    return columns
+
+
+def write_partitioned_dataset(frames, dataset_dir, date_col=None, period='month', by_l1=False,
+                              fmt='parquet', workers=4):
+    check_dataset_format(fmt)
+    date_cols = resolve_partition_columns(frames, date_col)
+
+    # Partitions are written to a staging area first, then each period present in this run
+    # replaces its own directory, so earlier periods already in the dataset are left alone
+    staging = dataset_dir / '_staging'
+    shutil.rmtree(staging, ignore_errors=True)
+    tasks = []
+    periods = set()
+    for sheet, df in frames.items():
+        # Both sheets share the partition directories, so each row carries its sheet
+        df = df.assign(Source_Sheet=sheet)
+        keys = [partition_periods(df[date_cols[sheet]], period).rename(period)]
+        if by_l1:
+            keys.append(df['Taxonomy_L1'].map(hive_escape).rename('Taxonomy_L1'))
+        slug = re.sub(r'\W+', '_', sheet).lower()
+        part_name = f"part-{slug}.{fmt}"
+        for key, group in df.groupby(keys, sort=False):
+            key = key if isinstance(key, tuple) else (key,)
+            periods.add(key[0])
+            partition = Path(f"{period}={key[0]}")
+            if by_l1:
+                partition = partition / f"Taxonomy_L1={key[1]}"
+                group = group.drop(columns='Taxonomy_L1')
+            tasks.append((group, staging / partition / part_name))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for future in [pool.submit(write_dataset_file, group, path, fmt) for group, path in tasks]:
+            future.result()
+
+    for value in sorted(periods):
+        target = dataset_dir / f"{period}={value}"
+        shutil.rmtree(target, ignore_errors=True)
+        (staging / f"{period}={value}").rename(target)
+    shutil.rmtree(staging, ignore_errors=True)
+    return sorted(periods), len(tasks)
+
+
+def xlsx_sheet_members(zf):
+    workbook = zf.read('xl/workbook.xml')
+    rels = zf.read('xl/_rels/workbook.xml.rels')
+    targets = {
+        rel_id.decode(): target.decode()
+        for rel_id, target in re.findall(rb'<Relationship\b[^>]*?Id="([^"]+)"[^>]*?Target="([^"]+)"', rels)
+    }
+    targets.update({
+        rel_id.decode(): target.decode()
+        for target, rel_id in re.findall(rb'<Relationship\b[^>]*?Target="([^"]+)"[^>]*?Id="([^"]+)"', rels)
+    })
+    members = {}
+    for attrs in re.findall(rb'<sheet\b([^>]*)/?>', workbook):
+        name = re.search(rb'\bname="([^"]*)"', attrs).group(1)
+        rel_id = re.search(rb'\br:id="([^"]*)"', attrs).group(1).decode()
+        target = targets[rel_id]
+        members[html.unescape(name.decode())] = target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    return members
+
+
+def iter_xlsx_rows(zf, member, chunk_size=XLSX_CHUNK_SIZE):
+    buffer = b''
+    with zf.open(member) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            end = buffer.rfind(b'</row>') + len(b'</row>') if chunk else len(buffer)
+            if end < len(b'</row>'):
+                continue
+            for match in XLSX_ROW_PATTERN.finditer(buffer, 0, end):
+                yield match.group(0)
+            buffer = buffer[end:]
+            if not chunk:
+                return
+
+
+def column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + letter - 64
+    return index - 1
+
+
+def parse_xlsx_row(row):
+    cells = []
+    for position, (attrs, body) in enumerate(XLSX_CELL_PATTERN.findall(row)):
+        ref = XLSX_REF_PATTERN.search(attrs)
+        kind = XLSX_TYPE_PATTERN.search(attrs)
+        style = XLSX_STYLE_PATTERN.search(attrs)
+        if not body:
+            raw = None
+        elif kind and kind.group(1) == b'inlineStr':
+            raw = b''.join(XLSX_TEXT_PATTERN.findall(body))
+        else:
+            value = XLSX_VALUE_PATTERN.search(body)
+            raw = value.group(1) if value else None
+        cells.append((
+            column_index(ref.group(1)) if ref else position,
+            kind.group(1).decode() if kind else 'n',
+            raw,
+            int(style.group(1)) if style else 0,
+        ))
+    return cells
+
+
+def load_shared_strings(zf, wanted=None):
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return {}
+    strings = {}
+    last = max(wanted) if wanted else None
+    with zf.open('xl/sharedStrings.xml') as f:
+        buffer = b''
+        index = 0
+        while True:
+            chunk = f.read(XLSX_CHUNK_SIZE)
+            buffer += chunk
+            end = buffer.rfind(b'</si>') + len(b'</si>') if chunk else len(buffer)
+            if end >= len(b'</si>'):
+                for match in re.finditer(rb'<si>(.*?)</si>|<si/>', buffer[:end], re.S):
+                    if wanted is None or index in wanted:
+                        strings[index] = html.unescape(b''.join(XLSX_TEXT_PATTERN.findall(match.group(1) or b'')).decode())
+                    index += 1
+                buffer = buffer[end:]
+            if not chunk or (last is not None and index > last):
+                return strings
+
+
+def is_date_format(code):
+    code = re.sub(r'"[^"]*"|\\.|\[[^\]]*\]', '', code).lower()
+    return bool(re.search(r'[dmyhs]', code))
+
+
+def load_date_styles(zf):
+    if 'xl/styles.xml' not in zf.namelist():
+        return set()
+    styles = zf.read('xl/styles.xml')
+    date_formats = set(XLSX_DATE_FORMAT_IDS)
+    for fmt_id, code in re.findall(rb'<numFmt\b[^>]*?numFmtId="(\d+)"[^>]*?formatCode="([^"]*)"', styles):
+        if is_date_format(html.unescape(code.decode())):
+            date_formats.add(int(fmt_id))
+    cell_xfs = re.search(rb'<cellXfs\b.*?</cellXfs>', styles, re.S)
+    if not cell_xfs:
+        return set()
+    date_styles = set()
+    for index, attrs in enumerate(re.findall(rb'<xf\b([^>]*)', cell_xfs.group(0))):
+        fmt_id = re.search(rb'numFmtId="(\d+)"', attrs)
+        if fmt_id and int(fmt_id.group(1)) in date_formats:
+            date_styles.add(index)
+    return date_styles
+
+
+def excel_serial_to_datetime(serial, date1904=False):
+    if date1904:
+        return datetime(1904, 1, 1) + timedelta(days=serial)
+    # Excel's phantom 1900-02-29 shifts every serial before it by one day
+    if serial < 60:
+        serial += 1
+    return datetime(1899, 12, 30) + timedelta(days=serial)
+
+
+def xlsx_cell_value(kind, raw, shared_strings):
+    if raw is None:
+        return None
+    if kind == 's':
+        return shared_strings.get(int(raw))
+    if kind in ('str', 'inlineStr'):
+        return html.unescape(raw.decode())
+    if kind == 'b':
+        return raw == b'1'
+    if kind == 'e':
+        return None
+    number = float(raw)
+    return int(number) if number.is_integer() else number
+
+
+def mangle_columns(columns):
+    seen = {}
+    result = []
+    for name in columns:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        result.append(name if count == 0 else f"{name}.{count}")
+    return result
+
+
+def xlsx_rows_to_frame(header, rows, shared_strings, date_styles=frozenset(), date1904=False):
+    # header and rows are parse_xlsx_row() cell lists; shared by the full reader and --estimate
+    width = max(col for col, _, _, _ in header) + 1 if header else 0
+    columns = [None] * width
+    for col, kind, raw, _ in header:
+        columns[col] = xlsx_cell_value(kind, raw, shared_strings)
+    columns = mangle_columns([
+        name if name is not None else f"Unnamed: {i}" for i, name in enumerate(columns)
+    ])
+
+    records = []
+    for cells in rows:
+        record = [None] * width
+        blank = True
+        for col, kind, raw, style in cells:
+            if col >= width:
+                continue
+            value = xlsx_cell_value(kind, raw, shared_strings)
+            if value is None:
+                continue
+            if kind == 'n' and style in date_styles:
+                value = excel_serial_to_datetime(value, date1904)
+            record[col] = value
+            blank = False
+        # read_excel drops blank rows, so do the same
+        if not blank:
+            records.append(record)
+    return pd.DataFrame(records, columns=columns)
+
+
+def read_xlsx_sheet_xml(zf, member, shared_strings, date_styles, date1904=False):
+    rows = iter_xlsx_rows(zf, member)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+    return xlsx_rows_to_frame(
+        parse_xlsx_row(header), (parse_xlsx_row(row) for row in rows), shared_strings, date_styles, date1904,
+    )
+
+
+def read_sheets_xml(path, sheet_names):
+    with zipfile.ZipFile(path) as zf:
+        members = xlsx_sheet_members(zf)
+        missing = [sheet for sheet in sheet_names if sheet not in members]
+        if missing:
+            raise ValueError(f"Worksheet(s) {', '.join(missing)} not found in {path}")
+        shared_strings = load_shared_strings(zf)
+        date_styles = load_date_styles(zf)
+        date1904 = bool(re.search(rb'date1904="(1|true)"', zf.read('xl/workbook.xml')))
+        return {
+            sheet: read_xlsx_sheet_xml(zf, members[sheet], shared_strings, date_styles, date1904)
+            for sheet in sheet_names
+        }
 
+
+def read_excel_text_safe(workbook, sheet):
+    # read_excel would turn a text cell like "007" into 7, so pin code columns to object
+    columns = pd.read_excel(workbook, sheet_name=sheet, nrows=0).columns
+    dtype = {col: object for col in columns if isinstance(col, str) and TEXT_COLUMN_PATTERN.search(col)}
+    return pd.read_excel(workbook, sheet_name=sheet, dtype=dtype or None)
+
+
+def read_sheets_openpyxl(path, sheet_names):
+    with pd.ExcelFile(path, engine='openpyxl') as workbook:
+        return {sheet: read_excel_text_safe(workbook, sheet) for sheet in sheet_names}
+
+
+def read_sheets_pandas(path, sheet_names):
+    # Lets pandas pick the engine from the file type (e.g. xlrd for legacy .xls)
+    with pd.ExcelFile(path) as workbook:
+        return {sheet: read_excel_text_safe(workbook, sheet) for sheet in sheet_names}
+
+
+def read_sheets_calamine(path, sheet_names):
+    with pd.ExcelFile(path, engine='calamine') as workbook:
+        return {sheet: read_excel_text_safe(workbook, sheet) for sheet in sheet_names}
+
+
+EXCEL_READERS = {
+    'openpyxl': read_sheets_openpyxl,
+    'pandas': read_sheets_pandas,
+    'calamine': read_sheets_calamine,
+    'xml': read_sheets_xml,
+}
+
+
+def reader_available(name):
+    if name == 'calamine':
+        return importlib.util.find_spec('python_calamine') is not None
+    return True
+
+
+def select_reader(path, requested='auto'):
+    if requested != 'auto':
+        if not reader_available(requested):
+            raise ValueError(f"Reader '{requested}' is not installed (pip install python-calamine)")
+        if requested in ('openpyxl', 'xml') and not zipfile.is_zipfile(path):
+            raise ValueError(f"Reader '{requested}' only reads .xlsx files; use --reader calamine or pandas")
+        return requested
+    # Not an .xlsx zip (e.g. legacy .xls): calamine reads it, otherwise let pandas choose
+    if not zipfile.is_zipfile(path):
+        return 'calamine' if reader_available('calamine') else 'pandas'
+    if reader_available('calamine'):
+        return 'calamine'
+    if Path(path).stat().st_size >= XML_READER_MIN_BYTES:
+        return 'xml'
+    return 'openpyxl'
+
+
+def text_cell(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def normalize_text_columns(df):
+    for col in df.columns:
+        if isinstance(col, str) and TEXT_COLUMN_PATTERN.search(col):
+            df[col] = pd.Series([text_cell(v) for v in df[col].tolist()], index=df.index, dtype=object)
+    return df
+
+
+def read_workbook(path, sheet_names, reader='auto'):
+    reader = select_reader(path, reader)
+    sheets = EXCEL_READERS[reader](path, sheet_names)
+    return {sheet: normalize_text_columns(df) for sheet, df in sheets.items()}, reader
+
+
+def sample_xlsx_sheet(zf, member, n, rng):
+    # Reservoir sample over raw <row> bytes; only sampled rows get their cells parsed
+    rows = iter_xlsx_rows(zf, member)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame(), 0
+    reservoir = []
+    total = 0
+    for row in rows:
+        # Formatting-only rows carry no value; the full read drops them, so they aren't population
+        if not XLSX_PAYLOAD_PATTERN.search(row):
+            continue
+        if len(reservoir) < n:
+            reservoir.append((total, row))
+        else:
+            slot = rng.randrange(total + 1)
+            if slot < n:
+                reservoir[slot] = (total, row)
+        total += 1
+    reservoir.sort(key=lambda item: item[0])
+    header = parse_xlsx_row(header)
+    sampled = [parse_xlsx_row(row) for _, row in reservoir]
+    wanted = {int(raw) for cells in [header] + sampled for _, kind, raw, _ in cells if kind == 's' and raw is not None}
+    sample = xlsx_rows_to_frame(header, sampled, load_shared_strings(zf, wanted))
+    return sample, total
+
+
+def stratified_estimate(strata):
+    # strata: [(population, values)] -> (estimated total, CI half-width) with finite population correction
+    total = 0.0
+    variance = 0.0
+    for population, values in strata:
+        n = len(values)
+        if n == 0:
+            continue
+        mean = sum(values) / n
+        total += population * mean
+        if n > 1:
+            sample_var = sum((v - mean) ** 2 for v in values) / (n - 1)
+            variance += population ** 2 * sample_var / n * (1 - n / population)
+    return total, ESTIMATE_Z * math.sqrt(max(variance, 0.0))
+
+
+def estimate_coverage(input_path, n, seed=0, reader='auto', profile=DEFAULT_PROFILE):
+    rng = random.Random(seed)
+    samples = []
+    if zipfile.is_zipfile(input_path):
+        with zipfile.ZipFile(input_path) as zf:
+            members = xlsx_sheet_members(zf)
+            for sheet in TRANSACTION_SHEETS:
+                if sheet not in members:
+                    continue
+                sample, population = sample_xlsx_sheet(zf, members[sheet], n, rng)
+                if population:
+                    samples.append((sheet, population, categorize_dataframe(sample, profiles=[profile])))
+    else:
+        # Legacy .xls has no row stream to sample from, so the sheets are read whole and sampled in memory
+        sheets, _ = read_workbook(input_path, TRANSACTION_SHEETS, reader)
+        for sheet, df in sheets.items():
+            if len(df):
+                sample = df.sample(n=min(n, len(df)), random_state=seed).sort_index()
+                samples.append((sheet, len(df), categorize_dataframe(sample, profiles=[profile])))
+
+    population = sum(pop for _, pop, _ in samples)
     print("\n" + "=" * 60)
+    print("COVERAGE ESTIMATE")
+    print("=" * 60)
+    if profile is not DEFAULT_PROFILE:
+        print(f"  Taxonomy profile    : {profile.name}")
+    for sheet, pop, sample in samples:
+        print(f"  {sheet:20s}: sampled {len(sample):,} of {pop:,} rows")
+    if not population:
+        print("  No transaction rows found")
+        return
+
+    methods = sorted({m for _, _, sample in samples for m in sample['Match_Method'].unique()})
+    print("\n=== Estimated Match Method Distribution (95% CI) ===")
+    for method in methods:
+        strata = [(pop, (sample['Match_Method'] == method).astype(float).tolist()) for _, pop, sample in samples]
+        rows, half_width = stratified_estimate(strata)
+        print(f"  {method:20s}: {rows / population * 100:5.1f}% +/- {half_width / population * 100:.1f}%"
+              f"  (~{rows:,.0f} rows)")
+
+    spend_cols = [find_spend_column(sample) for _, _, sample in samples]
+    if any(spend_cols):
+        print("\n=== Estimated Spend (95% CI) ===")
+        spends = [
+            sample[col].map(spend_value) if col else pd.Series(0.0, index=sample.index)
+            for (_, _, sample), col in zip(samples, spend_cols)
+        ]
+        total, half_width = stratified_estimate([(pop, spend.tolist()) for (_, pop, _), spend in zip(samples, spends)])
+        print(f"  {'Total':20s}: ${total:,.0f} +/- ${half_width:,.0f}")
+        uncategorized = [
+            (pop, spend.where(sample['Taxonomy_L1'].isna(), 0.0).tolist())
+            for (_, pop, sample), spend in zip(samples, spends)
+        ]
+        missing, half_width = stratified_estimate(uncategorized)
+        pct = missing / total * 100 if total else 0
+        print(f"  {'Uncategorized':20s}: ${missing:,.0f} +/- ${half_width:,.0f} ({pct:.1f}% of spend)")
+
+    unmapped = Counter()
+    for _, _, sample in samples:
+        # Unmapped 99xxxxxx codes come back as CUSTOM_MAP with no taxonomy, so also take any row without an L1
+        rows = sample[sample['Match_Method'].isin(['SEGMENT_FALLBACK', 'UNMATCHED']) | sample['Taxonomy_L1'].isna()]
+        unmapped.update(rows['Category Name'].fillna('(blank)').astype(str))
+    if unmapped:
+        print("\n=== Most Frequent Unmapped Category Names (in sample) ===")
+        for name, count in unmapped.most_common(10):
+            print(f"  {count:6,}  {name}")
+
+    print("\n" + "=" * 60)
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class Checkpoint:
+    """Staging area of categorized chunks plus a JSON progress manifest.
+
+    Each chunk is pickled (frame and its RuleStats) as soon as it is categorized, and the
+    manifest is replaced atomically after every chunk, so a run that dies keeps all
+    finished chunks. The fingerprint ties the checkpoint to one input file and settings.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory, fingerprint, manifest=None):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.manifest = manifest or {'fingerprint': fingerprint, 'sheets': {}, 'progress': {}}
+
+    @classmethod
+    def open(cls, directory, fingerprint, resume=False):
+        manifest_path = directory / cls.MANIFEST
+        if resume and manifest_path.exists():
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest['fingerprint'] != fingerprint:
+                raise ValueError(
+                    f"Checkpoint in {directory} was made from a different input or settings; "
+                    "rerun without --resume to start over"
+                )
+            return cls(directory, fingerprint, manifest)
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+        checkpoint = cls(directory, fingerprint)
+        checkpoint.write_manifest()
+        return checkpoint
+
+    def write_manifest(self):
+        path = self.directory / self.MANIFEST
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, path)
+
+    def sheet(self, sheet):
+        return self.manifest['sheets'].get(sheet)
+
+    def sheet_complete(self, sheet):
+        entry = self.sheet(sheet)
+        return entry is not None and len(entry['chunks']) == entry['total_chunks']
+
+    def start_sheet(self, sheet, rows, chunk_size):
+        if self.sheet(sheet) is None:
+            self.manifest['sheets'][sheet] = {
+                'rows': rows,
+                'total_chunks': max(1, -(-rows // chunk_size)),
+                'chunks': {},
+            }
+            self.write_manifest()
+        return self.sheet(sheet)
+
+    def chunk_path(self, sheet, index):
+        slug = re.sub(r'\W+', '_', sheet).lower()
+        return self.directory / slug / f"chunk_{index:05d}.pkl"
+
+    def save_chunk(self, sheet, index, frame, stats=None):
+        path = self.chunk_path(sheet, index)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pd.to_pickle({'frame': frame, 'stats': stats}, path)
+        self.manifest['sheets'][sheet]['chunks'][str(index)] = {'rows': len(frame), 'file': str(path.relative_to(self.directory))}
+
+    def report_progress(self, rows_done, rows_total, elapsed):
+        rate = rows_done / elapsed if elapsed > 0 else 0.0
+        eta = (rows_total - rows_done) / rate if rate > 0 else None
+        self.manifest['progress'] = {
+            'rows_done': rows_done,
+            'rows_total': rows_total,
+            'rows_per_second': round(rate, 1),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'updated': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.write_manifest()
+        return rate, eta
+
+    def load_sheet(self, sheet):
+        entry = self.sheet(sheet)
+        frames = []
+        stats = None
+        for index in range(entry['total_chunks']):
+            chunk = pd.read_pickle(self.directory / entry['chunks'][str(index)]['file'])
+            frames.append(chunk['frame'])
+            if chunk['stats'] is not None:
+                stats = chunk['stats'] if stats is None else stats.merge(chunk['stats'])
+        return pd.concat(frames, ignore_index=True), stats
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def categorize_with_checkpoints(sheets, checkpoint, chunk_size, stats=None, profiles=None, quiet=False):
+    # sheets maps each sheet to its raw frame, or None when it is already fully checkpointed
+    pending = {
+        sheet: df for sheet, df in sheets.items()
+        if df is not None and not checkpoint.sheet_complete(sheet)
+    }
+    for sheet, df in pending.items():
+        checkpoint.start_sheet(sheet, len(df), chunk_size)
+    rows_total = sum(
+        len(df) - sum(chunk['rows'] for chunk in checkpoint.sheet(sheet)['chunks'].values())
+        for sheet, df in pending.items()
+    )
+
+    rows_done = 0
+    started = time.perf_counter()
+    for sheet, df in pending.items():
+        entry = checkpoint.sheet(sheet)
+        if not quiet:
+            print(f"Processing {sheet} ({len(df)} rows, {len(entry['chunks'])}/{entry['total_chunks']} chunks done)...")
+        for index in range(entry['total_chunks']):
+            if str(index) in entry['chunks']:
+                continue
+            chunk = df.iloc[index * chunk_size:(index + 1) * chunk_size]
+            chunk_stats = RuleStats(profile=stats.profile) if stats is not None else None
+            categorized = categorize_dataframe(chunk, stats=chunk_stats, profiles=profiles)
+            checkpoint.save_chunk(sheet, index, categorized, chunk_stats)
+            rows_done += len(chunk)
+            rate, eta = checkpoint.report_progress(rows_done, rows_total, time.perf_counter() - started)
+            if not quiet:
+                eta_text = format_duration(eta) if eta is not None else '?'
+                print(f"  chunk {index + 1}/{entry['total_chunks']}: {rows_done:,}/{rows_total:,} rows, "
+                      f"{rate:,.0f} rows/s, ETA {eta_text}")
+
+    categorized = {}
+    for sheet in sheets:
+        categorized[sheet], sheet_stats = checkpoint.load_sheet(sheet)
+        if stats is not None and sheet_stats is not None:
+            stats.merge(sheet_stats)
+    return categorized
 
 
 def main():
@@ -455,59 +1876,144 @@ def main():
     input_path = base_path / args.input
     output_path = base_path / args.output
 
+    loaded = load_profiles(base_path / args.profiles) if args.profiles else []
+    names = args.profile or ['default'] + loaded
+    unknown = [name for name in names if name not in TAXONOMY_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown taxonomy profile(s): {', '.join(unknown)}")
+    profiles = [TAXONOMY_PROFILES[name] for name in names]
+
+    if args.estimate is not None:
+        # Like the summary, the estimate follows the first profile
+        estimate_coverage(input_path, args.estimate, reader=args.reader, profile=profiles[0])
+        return
+
+    # Resolved up front so a checkpoint is only resumed with the same backend
+    reader = select_reader(input_path, args.reader)
+
+    checkpoint = None
+    if args.checkpoint or args.resume:
+        stat = input_path.stat()
+        fingerprint = {
+            'input': str(input_path.resolve()),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'chunk_size': args.chunk_size,
+            'profiles': [[profile.name, profile_digest(profile)] for profile in profiles],
+            'reader': reader,
+            'rule_stats': args.rule_stats,
+        }
+        checkpoint_dir = output_path.with_name(f"{output_path.stem}_checkpoint")
+        checkpoint = Checkpoint.open(checkpoint_dir, fingerprint, resume=args.resume)
+
+    # Sheets already fully checkpointed are not read again on --resume
+    to_read = [sheet for sheet in TRANSACTION_SHEETS if checkpoint is None or not checkpoint.sheet_complete(sheet)]
     if not args.quiet:
         print("Loading UCH data...")
-    uch_data = pd.ExcelFile(input_path)
-    services = pd.read_excel(uch_data, sheet_name='Services Only')
-    org = pd.read_excel(uch_data, sheet_name='Org Data Pull')
-    suppliers = pd.read_excel(uch_data, sheet_name='Supplier Listing')
-
+    sheets, reader = read_workbook(input_path, to_read + ['Supplier Listing'], reader)
+    suppliers = sheets.pop('Supplier Listing')
     if not args.quiet:
-        print(f"Processing Services Only ({len(services)} rows)...")
-    services_cat = categorize_dataframe(services)
+        print(f"Read {input_path.name} with the {reader} reader")
+        if len(to_read) < len(TRANSACTION_SHEETS):
+            done = [sheet for sheet in TRANSACTION_SHEETS if sheet not in to_read]
+            print(f"Resuming: {', '.join(done)} already categorized")
+    row_counts = {
+        sheet: len(sheets[sheet]) if sheet in sheets else checkpoint.sheet(sheet)['rows']
+        for sheet in TRANSACTION_SHEETS
+    }
 
-    if not args.quiet:
-        print(f"Processing Org Data Pull ({len(org)} rows)...")
-    org_cat = categorize_dataframe(org)
+    dataset_dir = base_path / args.dataset if args.dataset else None
+    if dataset_dir is not None:
+        # Fail on a missing dependency or date column now, not after categorizing
+        check_dataset_format(args.dataset_format)
+        resolve_partition_columns(sheets, args.partition_column)
+
+    # Plan the split before categorizing so an oversized sheet can't fail the final write
+    plan = plan_shards(
+        [('Supplier Listing', len(suppliers))] + [(sheet, row_counts[sheet]) for sheet in TRANSACTION_SHEETS],
+        output_path, max_rows=args.max_sheet_rows, mode=args.shard_mode,
+    )
+    if is_sharded(plan) and dataset_dir is None and not args.quiet:
+        files = len({entry['file'] for entry in plan})
+        print(f"Output exceeds {args.max_sheet_rows:,} rows per sheet; "
+              f"splitting into {len(plan)} shards across {files} file(s)")
+
+    if len(profiles) > 1 and not args.quiet:
+        print(f"Taxonomy profiles: {', '.join(names)} (columns for {', '.join(names[1:])} are suffixed)")
+
+    stats = RuleStats(profile=profiles[0]) if args.rule_stats else None
+
+    if checkpoint is not None:
+        for sheet in TRANSACTION_SHEETS:
+            sheets.setdefault(sheet, None)
+        categorized = categorize_with_checkpoints(
+            sheets, checkpoint, args.chunk_size, stats=stats, profiles=profiles, quiet=args.quiet,
+        )
+    else:
+        categorized = {}
+        for sheet in TRANSACTION_SHEETS:
+            if not args.quiet:
+                print(f"Processing {sheet} ({len(sheets[sheet])} rows)...")
+            categorized[sheet] = categorize_dataframe(sheets[sheet], stats=stats, profiles=profiles)
+    del sheets
+    services_cat = categorized['Services Only']
+    org_cat = categorized['Org Data Pull']
+
+    if args.normalize_suppliers:
+        aliases_path = base_path / args.supplier_aliases
+        aliases = load_supplier_aliases(aliases_path)
+        cached = len(aliases)
+        aliases = build_supplier_aliases(count_suppliers([services_cat, org_cat]), aliases)
+        for df in (services_cat, org_cat):
+            apply_supplier_aliases(df, aliases)
+        save_supplier_aliases(aliases, aliases_path)
+        if not args.quiet:
+            vendors = len({canonical for _, canonical in aliases.values()})
+            print(f"Normalized {len(aliases):,} supplier names into {vendors:,} vendors "
+                  f"({len(aliases) - cached:,} new, alias table: {aliases_path})")
 
     if not args.quiet:
-        print(f"Writing output to {output_path}...")
+        print(f"Writing output to {dataset_dir or output_path}...")
 
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        suppliers.to_excel(writer, sheet_name='Supplier Listing', index=False)
-        services_cat.to_excel(writer, sheet_name='Services Only', index=False)
-        org_cat.to_excel(writer, sheet_name='Org Data Pull', index=False)
+    if dataset_dir is not None:
+        dataset_dir.mkdir(parents=True, exist_ok=True)
+        periods, files = write_partitioned_dataset(
+            {'Services Only': services_cat, 'Org Data Pull': org_cat}, dataset_dir,
+            date_col=args.partition_column, period=args.partition_period, by_l1=args.partition_l1,
+            fmt=args.dataset_format, workers=args.dataset_workers,
+        )
+        write_dataset_file(suppliers, dataset_dir / f"_supplier_listing.{args.dataset_format}", args.dataset_format)
+        if not args.quiet:
+            print(f"Wrote {files} files across {len(periods)} {args.partition_period} partition(s)")
+    else:
+        frames = {'Supplier Listing': suppliers, 'Services Only': services_cat, 'Org Data Pull': org_cat}
+        write_sharded_output(frames, plan, workers=args.shard_workers)
+        if is_sharded(plan):
+            manifest_path = write_shard_manifest(plan, output_path, max_rows=args.max_sheet_rows)
+            if not args.quiet:
+                print(f"Shard manifest written to: {manifest_path}")
 
-    all_cat = pd.concat([services_cat, org_cat])
+    # Both sheets are already in memory, so vendors are kept exact
+    analytics = SpendAnalytics(max_vendors=None)
+    analytics.update(services_cat)
+    analytics.update(org_cat)
 
     if not args.quiet:
-        print("\n=== Summary ===")
-        total = len(all_cat)
-        with_unspsc = all_cat['UNSPSC_Code'].notna().sum()
-        with_l1 = all_cat['Taxonomy_L1'].notna().sum()
-        with_l3 = all_cat['Taxonomy_L3'].notna().sum()
-        with_l4 = all_cat['Taxonomy_L4'].notna().sum()
-        with_l5 = all_cat['Taxonomy_L5'].notna().sum()
-        custom_mapped = all_cat['Original_Custom_Code'].notna().sum()
-
-        print(f"Total transactions: {total}")
-        print(f"With UNSPSC code: {with_unspsc} ({with_unspsc/total*100:.1f}%)")
-        print(f"With Taxonomy L1: {with_l1} ({with_l1/total*100:.1f}%)")
-        print(f"With Taxonomy L3: {with_l3} ({with_l3/total*100:.1f}%)")
-        print(f"With Taxonomy L4: {with_l4} ({with_l4/total*100:.1f}%)")
-        print(f"With Taxonomy L5: {with_l5} ({with_l5/total*100:.1f}%)")
-        print(f"Custom codes mapped: {custom_mapped}")
-
-        print("\n=== Top 10 Taxonomy Keys by Transaction Count ===")
-        key_counts = all_cat['Taxonomy_Key'].value_counts().head(10)
-        for key, count in key_counts.items():
-            print(f"  {key}: {count}")
+        print_summary(analytics)
 
     if args.analytics:
-        generate_analytics_report(all_cat)
+        print_analytics_report(analytics)
+
+    if stats is not None:
+        json_path, csv_path = stats.write(output_path)
+        if not args.quiet:
+            print(f"\nRule stats written to: {json_path} and {csv_path}")
+
+    if checkpoint is not None:
+        checkpoint.remove()
 
     if not args.quiet:
-        print(f"\nDone! Output saved to: {output_path}")
+        print(f"\nDone! Output saved to: {dataset_dir or output_path}")
 
 
 if __name__ == '__main__':